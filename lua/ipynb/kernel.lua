@@ -233,6 +233,12 @@ local function handle_message(state, msg)
       kernel.callbacks.ping()
       kernel.callbacks.ping = nil
     end
+
+  elseif msg_type == "batch" then
+    -- Bursts of IOPub messages are coalesced into one line by the bridge
+    for _, item in ipairs(msg.msgs or {}) do
+      handle_message(state, item)
+    end
   end
 end
 
@@ -330,8 +336,14 @@ function M.start_bridge(state, python_path)
 
   local cmd = { python, bridge_path }
 
+  -- Trailing partial line from the previous on_stdout chunk
+  local stdout_partial = ""
+
   local job_id = vim.fn.jobstart(cmd, {
     on_stdout = function(_, data, _)
+      -- The last item is either "" or a line that continues in the next chunk
+      data[1] = stdout_partial .. data[1]
+      stdout_partial = table.remove(data)
       for _, line in ipairs(data) do
         if line and line ~= "" then
           local ok, msg = pcall(vim.json.decode, line)
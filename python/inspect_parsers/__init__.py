@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from typing import Callable, Dict, Any, Optional
 
 from . import python as python_parser
@@ -15,6 +16,7 @@ Parser = Callable[[Dict[str, Any]], InspectSections]
 # - definition/init_definition/call_def: first non-empty becomes "Signature".
 # - docstring/init_docstring/class_docstring/call_docstring: first non-empty becomes "Docstring".
 # - type_name/namespace/length/file: shown as "Metadata" key/value lines.
+# - source: shown as its own section when listed in _order (detail_level=1).
 # - _order: optional list of keys for non-Python kernels (preserves kernel-provided order).
 # - _raw: if true, UI will run Snacks.terminal.colorize() on the buffer.
 # - _mime: best mime selected from the kernel reply (text/plain, text/markdown, text/html, ...).
@@ -27,6 +29,7 @@ def _normalize(value: Optional[str]) -> Optional[str]:
     return value.strip().lower()
 
 
+@functools.lru_cache(maxsize=16)
 def get_parser(language: Optional[str], kernel_name: Optional[str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
     name = _normalize(kernel_name)
     lang = _normalize(language)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import re
+
+# Shared by all parsers; the pattern is pure ASCII, so skip Unicode matching.
+# Real SGR sequences carry a handful of parameters; cap the run at 32 chars.
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]{0,32}m", re.ASCII)
+
+
+def strip_ansi(text: str) -> str:
+    if not text or "\x1b" not in text:
+        return text
+    return ANSI_ESCAPE_PATTERN.sub("", text)
@@ -1,23 +1,42 @@
 from __future__ import annotations
 
+import functools
 import html
 import re
 from typing import Dict, Any
 
-from .types import InspectSections
+from ._ansi import strip_ansi
+from .types import FIELD_NAMES, InspectSections
 
-ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
-KEY_PATTERN = re.compile(r'\x1b\[31m([\w\s]+):\x1b\[39m')
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
 
 KERNEL_NAME_ALIASES = set()
 
-
-def strip_ansi(text: str) -> str:
-    if text is None:
-        return text
-    return ANSI_ESCAPE_PATTERN.sub('', text)
-
-
+_KEY_MAP = {
+    "Type": "type_name",
+    "String form": "string_form",
+    "Length": "length",
+    "File": "file",
+    "Docstring": "docstring",
+    "Init docstring": "init_docstring",
+    "Class docstring": "class_docstring",
+    "Call docstring": "call_docstring",
+    "Source": "source",
+    "Signature": "definition",
+    "Init signature": "init_definition",
+    "Call signature": "call_def",
+    "Namespace": "namespace",
+    "Subclasses": "subclasses",
+    "Repr": "string_form",
+}
+
+# Only match section names we map, so unknown keys never reach the parse loop
+KEY_PATTERN = re.compile(
+    r'\x1b\[31m(' + '|'.join(re.escape(key) for key in _KEY_MAP) + r'):\x1b\[39m'
+)
+
+
+@functools.lru_cache(maxsize=256)
 def parse_inspect_output(text: str) -> dict:
     """
     Parse IPython inspect output into structured sections.
@@ -27,43 +46,18 @@ def parse_inspect_output(text: str) -> dict:
     if not text:
         return {}
 
-    key_map = {
-        "Type": "type_name",
-        "String form": "string_form",
-        "Length": "length",
-        "File": "file",
-        "Docstring": "docstring",
-        "Init docstring": "init_docstring",
-        "Class docstring": "class_docstring",
-        "Call docstring": "call_docstring",
-        "Source": "source",
-        "Signature": "definition",
-        "Init signature": "init_definition",
-        "Call signature": "call_def",
-        "Namespace": "namespace",
-        "Subclasses": "subclasses",
-        "Repr": "string_form",
-    }
-
-    matches = list(KEY_PATTERN.finditer(text))
-    if not matches:
+    # split() yields [preamble, key, value, key, value, ...] in one scan
+    parts = KEY_PATTERN.split(text)
+    if len(parts) == 1:
         return {"string_form": strip_ansi(text).strip()} if text.strip() else {}
 
     result = {}
     order = []
-    for i, match in enumerate(matches):
-        key = match.group(1)
-        normalized_key = key_map.get(key)
-        if not normalized_key:
-            continue
-
-        value_start = match.end()
-        value_end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-        value = text[value_start:value_end]
-
+    for key, value in zip(parts[1::2], parts[2::2]):
+        normalized_key = _KEY_MAP[key]
         value = strip_ansi(value).strip()
         if value:
-            result[normalized_key] = str(value)
+            result[normalized_key] = value
             order.append(normalized_key)
 
     if order:
@@ -81,7 +75,8 @@ def _looks_like_ipython_sections(text: str) -> bool:
 def _strip_html(text: str) -> str:
     if not text:
         return text
-    text = re.sub(r"<[^>]+>", "", text)
+    if "<" in text:
+        text = HTML_TAG_PATTERN.sub("", text)
     return html.unescape(text).strip()
 
 
@@ -93,8 +88,10 @@ def parse(data: Dict[str, Any]) -> InspectSections:
     if isinstance(text_plain, str) and _looks_like_ipython_sections(text_plain):
         sections = parse_inspect_output(text_plain)
         if sections:
-            sections["_mime"] = "text/plain"
-            return InspectSections(**sections)
+            # parse_inspect_output is cached; never mutate the dict it returns
+            result = InspectSections(*map(sections.get, FIELD_NAMES))
+            result._mime = "text/plain"
+            return result
 
     if isinstance(text_md, str) and text_md.strip():
         return InspectSections(string_form=text_md, _mime="text/markdown")
@@ -4,22 +4,18 @@ import html
 import re
 from typing import Dict, Any
 
+from ._ansi import strip_ansi
 from .types import InspectSections
 
 
-ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
-
-
-def _strip_ansi(text: str) -> str:
-    if not text:
-        return text
-    return ANSI_ESCAPE_PATTERN.sub("", text)
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
 
 
 def _strip_html(text: str) -> str:
     if not text:
         return text
-    text = re.sub(r"<[^>]+>", "", text)
+    if "<" in text:
+        text = HTML_TAG_PATTERN.sub("", text)
     return html.unescape(text).strip()
 
 
@@ -33,7 +29,7 @@ def parse(data: Dict[str, Any]) -> InspectSections:
             string_form=text_plain,
             _raw=True,
             _mime="text/plain",
-            _clean=_strip_ansi(text_plain),
+            _clean=strip_ansi(text_plain),
         )
 
     if isinstance(text_md, str) and text_md.strip():
@@ -41,16 +37,17 @@ def parse(data: Dict[str, Any]) -> InspectSections:
             string_form=text_md,
             _raw=True,
             _mime="text/markdown",
-            _clean=_strip_ansi(text_md),
+            _clean=strip_ansi(text_md),
         )
 
     if isinstance(text_html, str) and text_html.strip():
         stripped = _strip_html(text_html)
+        # HTML carries no terminal escapes, so the stripped text is already clean
         return InspectSections(
             string_form=stripped,
             _raw=True,
             _mime="text/html",
-            _clean=_strip_ansi(stripped),
+            _clean=stripped,
         )
 
     return InspectSections()
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import List, Optional, Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class InspectSections:
     string_form: Optional[str] = None
     docstring: Optional[str] = None
@@ -19,11 +19,21 @@ class InspectSections:
     class_docstring: Optional[str] = None
     init_docstring: Optional[str] = None
     call_docstring: Optional[str] = None
+    source: Optional[str] = None
     _order: Optional[List[str]] = None
     _raw: Optional[bool] = None
     _mime: Optional[str] = None
     _clean: Optional[str] = None
 
 
+# Declaration order, for positional construction and as_dict
+FIELD_NAMES = tuple(f.name for f in fields(InspectSections))
+
+
 def as_dict(sections: InspectSections) -> Dict[str, Any]:
-    return asdict(sections)
+    # Shallow copy (the result is only JSON-encoded); unset fields are omitted
+    return {
+        name: value
+        for name in FIELD_NAMES
+        if (value := getattr(sections, name)) is not None
+    }
@@ -9,14 +9,16 @@ Uses jupyter_client to manage kernel connections.
 import json
 import sys
 import threading
+import time
 import queue
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any
 
 from inspect_parsers import get_parser
 
-
 try:
     import jupyter_client
+    from jupyter_client.jsonutil import json_default
 except ImportError:
     print(json.dumps({
         "type": "error",
@@ -25,6 +27,42 @@ except ImportError:
     sys.exit(1)
 
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any) -> bytes:
+    """Encode a message as UTF-8 JSON bytes, using orjson when available.
+
+    Kernel content can carry datetimes or bytes; json_default converts
+    them the same way jupyter_client does.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=json_default)
+        except TypeError:
+            # e.g. ints wider than 64 bits; the stdlib encoder handles these
+            pass
+    return json.dumps(obj, default=json_default).encode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Upper bound on tracked executions. Entries outlive their idle status so late
+# output (threads, timers, widget callbacks) still routes to its cell; the
+# oldest entry is evicted once the cap is reached
+MAX_PENDING_EXECUTIONS = 4096
+
+# Once a second message is already queued behind the first, messages arriving
+# within this window (seconds) are coalesced into one {"type": "batch"} line,
+# up to OUTPUT_BATCH_MAX. A lone message is written without waiting.
+OUTPUT_BATCH_WINDOW = 0.005
+OUTPUT_BATCH_MAX = 256
+
+
 class KernelBridge:
     """Manages a Jupyter kernel connection and handles message passing."""
 
@@ -33,15 +71,26 @@ class KernelBridge:
         self.kernel_client: Optional[jupyter_client.KernelClient] = None
         self.kernel_name: str = "python3"
         self.kernel_language: Optional[str] = None
+        # Chosen once per kernel start/connect from its language and name
+        self.inspect_parser: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
         self.execution_count: int = 0
-        self.pending_executions: Dict[str, Dict[str, Any]] = {}
+        self.pending_executions: OrderedDict[str, Dict[str, Any]] = OrderedDict()
         self.iopub_thread: Optional[threading.Thread] = None
+        self.output_thread: Optional[threading.Thread] = None
         self.running = True
-        self.output_queue = queue.Queue()
+        # Outgoing messages; None tells the writer thread to stop
+        self.output_queue: queue.Queue[Optional[Dict[str, Any]]] = queue.Queue()
+        self._start_output_writer()
 
     def send_message(self, msg: Dict[str, Any]):
-        """Send a JSON message to stdout."""
-        print(json.dumps(msg), flush=True)
+        """Queue a message for the writer thread, which sends it to stdout as JSON."""
+        self.output_queue.put(msg)
+
+    def close(self):
+        """Flush queued messages and stop the writer thread."""
+        self.output_queue.put(None)
+        if self.output_thread:
+            self.output_thread.join(timeout=5)
 
     def start_kernel(self, kernel_name: str = "python3") -> bool:
         """Start a new Jupyter kernel."""
@@ -65,6 +114,7 @@ class KernelBridge:
             except Exception:
                 pass
             self.kernel_language = language
+            self.inspect_parser = get_parser(language, self.kernel_name)
 
             self.send_message({
                 "type": "kernel_started",
@@ -97,6 +147,7 @@ class KernelBridge:
             except Exception:
                 pass
             self.kernel_language = language
+            self.inspect_parser = get_parser(language, self.kernel_name)
 
             self.send_message({
                 "type": "kernel_connected",
@@ -129,6 +180,61 @@ class KernelBridge:
         self.iopub_thread = threading.Thread(target=listener, daemon=True)
         self.iopub_thread.start()
 
+    def _start_output_writer(self):
+        """Start the thread that encodes and writes all outgoing messages, batching bursts."""
+        def writer():
+            stopping = False
+            while not stopping:
+                msg = self.output_queue.get()
+                if msg is None:
+                    break
+                # Coalesce a burst of output into a single write; the window
+                # only opens once a second message is already waiting
+                batch = [msg]
+                deadline = None
+                while len(batch) < OUTPUT_BATCH_MAX:
+                    try:
+                        if deadline is None:
+                            item = self.output_queue.get_nowait()
+                        else:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            item = self.output_queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + OUTPUT_BATCH_WINDOW
+
+                parts = [self._encode(m) for m in batch]
+                if len(parts) == 1:
+                    line = parts[0]
+                else:
+                    line = b'{"type":"batch","msgs":[' + b",".join(parts) + b"]}"
+                try:
+                    sys.stdout.buffer.write(line + b"\n")
+                    sys.stdout.buffer.flush()
+                except OSError:
+                    # Neovim closed the pipe; nobody is left to read output
+                    break
+
+        self.output_thread = threading.Thread(target=writer, daemon=True)
+        self.output_thread.start()
+
+    def _encode(self, msg: Dict[str, Any]) -> bytes:
+        """Encode one message, replacing it with an error if it can't be serialized."""
+        try:
+            return _dumps(msg)
+        except (TypeError, ValueError) as e:
+            return _dumps({
+                "type": "error",
+                "error": f"Failed to encode {msg.get('type', 'message')}: {str(e)}"
+            })
+
     def _handle_iopub_message(self, msg: Dict[str, Any]):
         """Handle a message from the iopub channel."""
         msg_type = msg.get("msg_type", "")
@@ -218,6 +324,8 @@ class KernelBridge:
                 "code": code,
                 "has_user_expressions": bool(user_expressions)
             }
+            if len(self.pending_executions) > MAX_PENDING_EXECUTIONS:
+                self.pending_executions.popitem(last=False)
             self.send_message({
                 "type": "execute_request",
                 "cell_idx": cell_idx,
@@ -237,33 +345,45 @@ class KernelBridge:
             })
             return None
 
+    def _wait_for_shell_reply(self, msg_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the shell reply whose parent is msg_id, or None on timeout.
+
+        Commands are handled one at a time on the main thread, so this is the
+        only reader of the shell channel. Replies to other requests (plain
+        executes, or requests that already timed out) are discarded.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                reply = self.kernel_client.get_shell_msg(timeout=remaining)
+            except queue.Empty:
+                return None
+            if reply.get("parent_header", {}).get("msg_id") == msg_id:
+                return reply
+
     def _wait_for_execute_reply(self, msg_id: str, cell_idx: int):
         """Wait for execute_reply on shell channel and extract user_expressions results."""
         try:
-            # Poll shell channel for the execute_reply (with timeout)
-            while True:
-                reply = self.kernel_client.get_shell_msg(timeout=10)
-                if not reply:
-                    break
-                # Check if this is the reply for our execution
-                if reply.get("parent_header", {}).get("msg_id") == msg_id:
-                    if reply.get("msg_type") == "execute_reply":
-                        content = reply.get("content", {})
-                        user_expr_results = content.get("user_expressions", {})
-
-                        # Extract __ns__ result if present
-                        ns_result = user_expr_results.get("__ns__", {})
-                        if ns_result.get("status") == "ok":
-                            ns_data = ns_result.get("data", {}).get("text/plain", "{}")
-                            self.send_message({
-                                "type": "namespace",
-                                "cell_idx": cell_idx,
-                                "namespace_repr": ns_data
-                            })
-                        elif ns_result.get("status") == "error":
-                            # user_expressions evaluation failed, don't crash
-                            pass
-                        break
+            reply = self._wait_for_shell_reply(msg_id, timeout=10)
+            if reply and reply.get("msg_type") == "execute_reply":
+                content = reply.get("content", {})
+                user_expr_results = content.get("user_expressions", {})
+
+                # Extract __ns__ result if present
+                ns_result = user_expr_results.get("__ns__", {})
+                if ns_result.get("status") == "ok":
+                    ns_data = ns_result.get("data", {}).get("text/plain", "{}")
+                    self.send_message({
+                        "type": "namespace",
+                        "cell_idx": cell_idx,
+                        "namespace_repr": ns_data
+                    })
+                elif ns_result.get("status") == "error":
+                    # user_expressions evaluation failed, don't crash
+                    pass
         except Exception as e:
             # Don't fail execution if namespace capture fails
             self.send_message({
@@ -314,10 +434,17 @@ class KernelBridge:
         """Get kernel information."""
         if self.kernel_client:
             try:
-                info = self.kernel_client.kernel_info()
+                msg_id = self.kernel_client.kernel_info()
+                reply = self._wait_for_shell_reply(msg_id, timeout=5)
+                if not reply:
+                    self.send_message({
+                        "type": "error",
+                        "error": "Failed to get kernel info: no reply from kernel"
+                    })
+                    return
                 self.send_message({
                     "type": "kernel_info",
-                    "info": info
+                    "info": reply.get("content", {})
                 })
             except Exception as e:
                 self.send_message({
@@ -349,7 +476,7 @@ class KernelBridge:
         try:
             msg_id = self.kernel_client.complete(code, cursor_pos)
             # Completions come back on shell channel
-            reply = self.kernel_client.get_shell_msg(timeout=5)
+            reply = self._wait_for_shell_reply(msg_id, timeout=5)
             if reply and reply.get("msg_type") == "complete_reply":
                 content = reply.get("content", {})
                 self.send_message({
@@ -376,33 +503,23 @@ class KernelBridge:
 
         try:
             msg_id = self.kernel_client.inspect(code, cursor_pos, detail_level)
-            # Inspection reply comes back on shell channel - wait for OUR reply
-            while True:
-                reply = self.kernel_client.get_shell_msg(timeout=5)
-                if not reply:
-                    break
-                # Check if this reply is for our request
-                parent_msg_id = reply.get("parent_header", {}).get("msg_id")
-                if parent_msg_id != msg_id:
-                    # Not our reply, keep waiting
-                    continue
-                if reply.get("msg_type") == "inspect_reply":
-                    content = reply.get("content", {})
-                    data = content.get("data", {})
-                    sections = {}
-                    # Return raw text/plain for now; no custom parsing
-                    parser = get_parser(self.kernel_language, self.kernel_name)
-                    sections = parser(data)
-                    self.send_message({
-                        "type": "inspect_reply",
-                        "request_id": request_id,
-                        "found": content.get("found", False),
-                        "sections": sections,
-                        "data": data,
-                        "metadata": content.get("metadata", {})
-                    })
-                    return
-                break
+            # Inspection reply comes back on shell channel
+            reply = self._wait_for_shell_reply(msg_id, timeout=5)
+            if reply and reply.get("msg_type") == "inspect_reply":
+                content = reply.get("content", {})
+                data = content.get("data", {})
+                sections = {}
+                parser = self.inspect_parser or get_parser(self.kernel_language, self.kernel_name)
+                sections = parser(data)
+                self.send_message({
+                    "type": "inspect_reply",
+                    "request_id": request_id,
+                    "found": content.get("found", False),
+                    "sections": sections,
+                    "data": data,
+                    "metadata": content.get("metadata", {})
+                })
+                return
             # No valid reply found
             self.send_message({
                 "type": "inspect_reply",
@@ -427,14 +544,15 @@ def main():
     bridge.send_message({"type": "ready"})
 
     try:
-        for line in sys.stdin:
+        # Newline-delimited JSON; read bytes and decode them directly
+        for line in sys.stdin.buffer:
             line = line.strip()
             if not line:
                 continue
 
             try:
-                cmd = json.loads(line)
-            except json.JSONDecodeError as e:
+                cmd = _loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
                 bridge.send_message({
                     "type": "error",
                     "error": f"Invalid JSON: {str(e)}"
@@ -507,6 +625,7 @@ def main():
         pass
     finally:
         bridge.shutdown()
+        bridge.close()
 
 
 if __name__ == "__main__":
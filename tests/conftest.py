@@ -0,0 +1,41 @@
+"""Shared pytest fixtures for the kernel bridge tests."""
+
+import os
+
+import pytest
+
+from test_kernel_bridge import KernelBridgeTest, reset_bridge
+
+# Bridges inherit this, so parallel workers don't race on __pycache__ writes
+os.environ.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+
+
+@pytest.fixture(scope="session")
+def bridge():
+    """One bridge process for the whole session.
+
+    Under pytest-xdist each worker is its own session, so every worker
+    gets a private bridge and kernel.
+    """
+    bridge = KernelBridgeTest()
+    bridge.start()
+    try:
+        yield bridge
+    finally:
+        bridge.stop()
+
+
+@pytest.fixture(scope="session")
+def kernel(bridge):
+    """One python3 kernel on the shared bridge; yields its kernel_id."""
+    msg = bridge.start_kernel()
+    assert msg is not None, "Kernel did not start"
+    yield msg["kernel_id"]
+
+
+@pytest.fixture(autouse=True)
+def _reset_bridge(request):
+    """Reset the shared bridge after each test that used it."""
+    yield
+    if "bridge" in request.fixturenames:
+        reset_bridge(request.getfixturevalue("bridge"))
@@ -4,403 +4,540 @@ Test the kernel bridge for ipynb.nvim
 
 Run with: uv run python tests/test_kernel_bridge.py
 Or: uv run pytest tests/test_kernel_bridge.py -v
+In parallel (needs pytest-xdist): uv run pytest tests/test_kernel_bridge.py -n auto
 """
 
+import inspect
 import subprocess
+import tempfile
+import threading
+import queue
 import time
 import json
 import os
 import sys
+from collections import defaultdict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(obj) -> bytes:
+    """Encode a command as UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
 
 # Get the path to the bridge script
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PLUGIN_DIR = os.path.dirname(SCRIPT_DIR)
 BRIDGE_PATH = os.path.join(PLUGIN_DIR, "python", "kernel_bridge.py")
 
+# Interpreter for the bridge; under `uv run` sys.executable is already the venv Python
+PY = os.environ.get("IPYNB_TEST_PYTHON") or sys.executable
+
+# Pre-encoded commands that carry no arguments
+_PING = _dumps({"action": "ping"}) + b"\n"
+_INFO = _dumps({"action": "info"}) + b"\n"
+_INTERRUPT = _dumps({"action": "interrupt"}) + b"\n"
+_RESTART = _dumps({"action": "restart"}) + b"\n"
+_SHUTDOWN = _dumps({"action": "shutdown"}) + b"\n"
+
+# Bytes per os.read on the bridge's stdout; one read usually holds a whole burst
+READ_CHUNK = 65536
+
 
 class KernelBridgeTest:
     """Test harness for kernel bridge."""
 
     def __init__(self):
         self.proc = None
+        self.messages: queue.Queue[dict | Exception] = queue.Queue()
+        self.reader = None
+        self.stderr = None
+        self.ready: dict | None = None
+        self.kernel: dict | None = None
 
     def start(self):
-        """Start the kernel bridge process."""
+        """Start the kernel bridge process.
+
+        Bridge stderr is discarded unless IPYNB_TEST_DEBUG is set, in which
+        case it goes to bridge-<pid>.err in the temp directory.
+        """
+        stderr = subprocess.DEVNULL
+        if os.environ.get("IPYNB_TEST_DEBUG"):
+            path = os.path.join(tempfile.gettempdir(), f"bridge-{os.getpid()}.err")
+            self.stderr = stderr = open(path, "wb")
         self.proc = subprocess.Popen(
-            ["uv", "run", "python", BRIDGE_PATH],
+            [PY, BRIDGE_PATH],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            cwd=PLUGIN_DIR,
+            stderr=stderr,
+            # Our fds are non-inheritable anyway; with no cwd either, CPython
+            # can start the bridge via posix_spawn instead of fork + exec
+            close_fds=False,
         )
+        self.messages = queue.Queue()
+        self.reader = threading.Thread(target=self._read_stdout, daemon=True)
+        self.reader.start()
+        self.ready = self.read_message(timeout=5)
 
     def stop(self):
         """Stop the kernel bridge process."""
         if self.proc:
             try:
-                self.send({"action": "shutdown"})
+                self._send_raw(_SHUTDOWN)
                 self.proc.wait(timeout=5)
             except Exception:
                 self.proc.terminate()
             self.proc = None
+            self.kernel = None
+        if self.stderr:
+            self.stderr.close()
+            self.stderr = None
+
+    def start_kernel(self) -> dict | None:
+        """Start the kernel once; later calls return the cached kernel_started."""
+        if self.kernel is None:
+            self.send({"action": "start", "kernel_name": "python3"})
+            self.kernel = self.wait_for_message("kernel_started", timeout=30)
+        return self.kernel
 
     def send(self, cmd: dict):
         """Send a command to the bridge."""
-        self.proc.stdin.write(json.dumps(cmd) + "\n")
+        self._send_raw(_dumps(cmd) + b"\n")
+
+    def send_many(self, cmds: list[dict]):
+        """Send several commands in a single write."""
+        self._send_raw(b"".join(_dumps(cmd) + b"\n" for cmd in cmds))
+
+    def _send_raw(self, payload: bytes):
+        """Send an already-encoded, newline-terminated command."""
+        self.proc.stdin.write(payload)
         self.proc.stdin.flush()
 
+    def _read_stdout(self):
+        """Reader thread: queue every message the bridge writes.
+
+        Reads whatever the pipe holds in one call and splits it into frames,
+        carrying a trailing partial line over to the next read. A frame that
+        fails to decode is queued as the exception and stops the reader, so
+        read_message raises it instead of timing out.
+        """
+        fd = self.proc.stdout.fileno()
+        buf = b""
+        while chunk := os.read(fd, READ_CHUNK):
+            *lines, buf = (buf + chunk).split(b"\n")
+            for line in lines:
+                try:
+                    msgs = self.decode(line)
+                except Exception as e:
+                    self.messages.put(RuntimeError(f"Bad frame from bridge {line[:200]!r}: {e}"))
+                    return
+                for msg in msgs:
+                    self.messages.put(msg)
+
+    def decode(self, line: bytes) -> list[dict]:
+        """Decode one line from the bridge, unpacking batched messages."""
+        msg = _loads(line)
+        if msg.get("type") == "batch":
+            return msg["msgs"]
+        return [msg]
+
     def read_message(self, timeout: float = 5.0) -> dict | None:
-        """Read a single message from the bridge."""
-        import select
-
-        start = time.time()
-        while time.time() - start < timeout:
-            if select.select([self.proc.stdout], [], [], 0.1)[0]:
-                line = self.proc.stdout.readline()
-                if line:
-                    return json.loads(line.strip())
-        return None
+        """Read a single message from the bridge, raising any reader error."""
+        try:
+            msg = self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if isinstance(msg, Exception):
+            # Keep it queued so every later read fails the same way
+            self.messages.put(msg)
+            raise msg
+        return msg
 
     def read_messages(self, timeout: float = 5.0) -> list[dict]:
         """Read all available messages within timeout."""
-        import select
-
         messages = []
-        start = time.time()
-        while time.time() - start < timeout:
-            if select.select([self.proc.stdout], [], [], 0.1)[0]:
-                line = self.proc.stdout.readline()
-                if line:
-                    messages.append(json.loads(line.strip()))
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            msg = self.read_message(timeout=remaining)
+            if msg is None:
+                break
+            messages.append(msg)
         return messages
 
-    def wait_for_message(self, msg_type: str, timeout: float = 10.0) -> dict | None:
-        """Wait for a specific message type."""
-        start = time.time()
-        while time.time() - start < timeout:
-            msg = self.read_message(timeout=0.5)
-            if msg and msg.get("type") == msg_type:
+    def wait_for_message(self, msg_type: str, timeout: float = 10.0, predicate=None) -> dict | None:
+        """Wait for a specific message type, optionally also matching predicate."""
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            msg = self.read_message(timeout=remaining)
+            if msg and msg.get("type") == msg_type and (predicate is None or predicate(msg)):
                 return msg
         return None
 
+    def collect_until_idle(
+        self,
+        predicate=lambda m: m.get("type") == "status" and m.get("state") == "idle",
+        max_wait: float = 10.0,
+    ) -> tuple[list[dict], dict[str, list[dict]]]:
+        """Collect messages until one matches predicate (default: idle status).
 
-def test_bridge_ready():
-    """Test that bridge starts and sends ready message."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        msg = bridge.read_message(timeout=5)
-        assert msg is not None, "No message received"
-        assert msg["type"] == "ready", f"Expected 'ready', got {msg['type']}"
-        print("PASS: Bridge starts and sends ready message")
-    finally:
-        bridge.stop()
-
-
-def test_ping_pong():
-    """Test ping/pong functionality."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        bridge.send({"action": "ping"})
-        msg = bridge.read_message(timeout=2)
-        assert msg is not None, "No pong received"
-        assert msg["type"] == "pong", f"Expected 'pong', got {msg['type']}"
-        print("PASS: Ping/pong works")
-    finally:
-        bridge.stop()
-
-
-def test_kernel_start():
-    """Test starting a kernel."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        msg = bridge.wait_for_message("kernel_started", timeout=30)
-        assert msg is not None, "Kernel did not start"
-        assert msg["kernel_name"] == "python3"
-        assert "kernel_id" in msg
-        print(f"PASS: Kernel started with ID {msg['kernel_id']}")
-    finally:
-        bridge.stop()
-
-
-def test_code_execution():
-    """Test executing code in the kernel."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        msg = bridge.wait_for_message("kernel_started", timeout=30)
-        assert msg is not None, "Kernel did not start"
-
-        # Execute code
-        bridge.send({
-            "action": "execute",
-            "code": "print('Hello from test!')",
-            "cell_idx": 0
-        })
-
-        # Collect messages until idle
+        Returns the messages in arrival order and the same messages indexed by type.
+        """
         messages = []
-        while True:
-            msg = bridge.read_message(timeout=10)
+        by_type = defaultdict(list)
+        deadline = time.monotonic() + max_wait
+        while (remaining := deadline - time.monotonic()) > 0:
+            msg = self.read_message(timeout=remaining)
             if msg is None:
                 break
             messages.append(msg)
-            if msg.get("type") == "status" and msg.get("state") == "idle":
+            by_type[msg.get("type")].append(msg)
+            if predicate(msg):
                 break
+        return messages, by_type
 
-        # Verify we got expected message types
-        msg_types = [m["type"] for m in messages]
-        assert "execute_request" in msg_types, "Missing execute_request"
-        assert "output" in msg_types, "Missing output"
 
-        # Find the output message
-        output_msg = next((m for m in messages if m["type"] == "output"), None)
-        assert output_msg is not None
-        assert output_msg["output"]["output_type"] == "stream"
-        assert "Hello from test!" in output_msg["output"]["text"]
+# cell_idx for harness-issued cells, so their idle can't be mistaken for a test's
+RESET_CELL_IDX = -1
 
-        print("PASS: Code execution works")
-    finally:
-        bridge.stop()
 
+def reset_bridge(bridge: KernelBridgeTest):
+    """Drain leftover output and clear the kernel namespace for the next test.
 
-def test_execution_count():
-    """Test that execution count increments."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        bridge.wait_for_message("kernel_started", timeout=30)
-
-        # Execute twice
-        for i in range(2):
-            bridge.send({
-                "action": "execute",
-                "code": f"x = {i}",
-                "cell_idx": i
-            })
-            # Wait for idle
-            while True:
-                msg = bridge.read_message(timeout=10)
-                if msg and msg.get("type") == "status" and msg.get("state") == "idle":
-                    break
-
-        # Execute a third time and check execution count
-        bridge.send({
-            "action": "execute",
-            "code": "y = 2",
-            "cell_idx": 2
-        })
-
-        exec_input = bridge.wait_for_message("execute_input", timeout=10)
-        assert exec_input is not None
-        assert exec_input["execution_count"] == 3, f"Expected count 3, got {exec_input['execution_count']}"
-
-        print("PASS: Execution count increments correctly")
-    finally:
-        bridge.stop()
+    The bridge writes in order, so reading up to a known reply (the reset
+    cell's idle, or a pong without a kernel) consumes everything before it.
+    """
+    if bridge.kernel is None:
+        bridge._send_raw(_PING)
+        bridge.wait_for_message("pong", timeout=5)
+        return
+    bridge.send({"action": "execute", "code": "%reset -f", "cell_idx": RESET_CELL_IDX})
+    bridge.collect_until_idle(
+        lambda m: m.get("type") == "status"
+        and m.get("state") == "idle"
+        and m.get("cell_idx") == RESET_CELL_IDX,
+        max_wait=30,
+    )
 
 
-def test_execute_result():
-    """Test execute_result output type."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
+def test_bridge_ready(bridge):
+    """Test that bridge starts and sends ready message."""
+    msg = bridge.ready
+    assert msg is not None, "No message received"
+    assert msg["type"] == "ready", f"Expected 'ready', got {msg['type']}"
+    print("PASS: Bridge starts and sends ready message")
 
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        bridge.wait_for_message("kernel_started", timeout=30)
 
-        # Execute expression (should produce execute_result)
-        bridge.send({
-            "action": "execute",
-            "code": "1 + 1",
-            "cell_idx": 0
-        })
+def test_ping_pong(bridge):
+    """Test ping/pong functionality."""
+    bridge._send_raw(_PING)
+    msg = bridge.read_message(timeout=2)
+    assert msg is not None, "No pong received"
+    assert msg["type"] == "pong", f"Expected 'pong', got {msg['type']}"
+    print("PASS: Ping/pong works")
 
-        # Collect until idle
-        messages = []
-        while True:
-            msg = bridge.read_message(timeout=10)
-            if msg is None:
-                break
-            messages.append(msg)
-            if msg.get("type") == "status" and msg.get("state") == "idle":
-                break
 
-        # Find execute_result
-        result_msg = next(
-            (m for m in messages if m["type"] == "output" and
-             m["output"]["output_type"] == "execute_result"),
-            None
-        )
-        assert result_msg is not None, "Missing execute_result output"
-        assert "2" in result_msg["output"]["data"]["text/plain"]
+def test_kernel_start(bridge, kernel):
+    """Test starting a kernel."""
+    msg = bridge.kernel
+    assert msg is not None, "Kernel did not start"
+    assert msg["kernel_name"] == "python3"
+    assert msg["kernel_id"] == kernel
+    print(f"PASS: Kernel started with ID {msg['kernel_id']}")
 
-        print("PASS: Execute result works")
-    finally:
-        bridge.stop()
 
+def test_kernel_info(bridge, kernel):
+    """Test kernel info returns the kernel_info_reply content."""
+    bridge._send_raw(_INFO)
+    msg = bridge.wait_for_message("kernel_info", timeout=10)
+    assert msg is not None, "Missing kernel_info"
+    assert isinstance(msg["info"], dict), f"Expected reply content, got {msg['info']!r}"
+    assert msg["info"]["language_info"]["name"] == "python"
 
-def test_error_handling():
-    """Test error output from invalid code."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
+    print("PASS: Kernel info works")
 
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        bridge.wait_for_message("kernel_started", timeout=30)
 
-        # Execute invalid code
-        bridge.send({
-            "action": "execute",
-            "code": "undefined_variable",
-            "cell_idx": 0
-        })
+def test_code_execution(bridge, kernel):
+    """Test executing code in the kernel."""
+    # Execute code
+    bridge.send({
+        "action": "execute",
+        "code": "print('Hello from test!')",
+        "cell_idx": 0
+    })
+
+    # Collect messages until idle
+    _, by_type = bridge.collect_until_idle()
+
+    # Verify we got expected message types
+    assert by_type["execute_request"], "Missing execute_request"
+    assert by_type["output"], "Missing output"
+
+    # Find the output message
+    output_msg = by_type["output"][0]
+    assert output_msg["output"]["output_type"] == "stream"
+    assert "Hello from test!" in output_msg["output"]["text"]
+
+    print("PASS: Code execution works")
+
+
+def test_stream_burst(bridge, kernel):
+    """Test that a burst of stream output arrives complete (batched or not)."""
+    # Flush every line so the kernel emits one stream message each
+    bridge.send({
+        "action": "execute",
+        "code": "for i in range(500): print(i, flush=True)",
+        "cell_idx": 0
+    })
+
+    # Collect until idle
+    _, by_type = bridge.collect_until_idle()
+
+    text = "".join(
+        m["output"]["text"] for m in by_type["output"]
+        if m["output"]["output_type"] == "stream"
+    )
+    assert text.split() == [str(i) for i in range(500)], "Stream output incomplete or out of order"
+
+    print("PASS: Stream burst arrives complete")
+
+
+def test_late_output(bridge, kernel):
+    """Test output printed after a cell's idle status keeps its cell_idx."""
+    bridge.send({
+        "action": "execute",
+        "code": "import threading; threading.Timer(0.5, lambda: print('late', flush=True)).start()",
+        "cell_idx": 3
+    })
+    bridge.collect_until_idle(
+        lambda m: m.get("type") == "status" and m.get("state") == "idle" and m.get("cell_idx") == 3
+    )
+
+    late = bridge.wait_for_message(
+        "output", predicate=lambda m: m["output"].get("text") == "late\n", timeout=5
+    )
+    assert late is not None, "Missing late output"
+    assert late["cell_idx"] == 3, f"Late output lost its cell: {late['cell_idx']!r}"
+
+    print("PASS: Late output keeps its cell")
+
+
+def test_execution_count(bridge, kernel):
+    """Test that execution count increments."""
+    # Execute twice in one write; the shared kernel may already have run other cells
+    bridge.send_many([
+        {"action": "execute", "code": f"x = {i}", "cell_idx": i}
+        for i in range(2)
+    ])
+    # Wait for the second cell's idle; the kernel runs them in order
+    _, by_type = bridge.collect_until_idle(
+        lambda m: m.get("type") == "status" and m.get("state") == "idle" and m.get("cell_idx") == 1
+    )
+    counts = [m["execution_count"] for m in by_type["execute_input"]]
+    assert len(counts) == 2, f"Expected two execute_input messages, got {counts}"
+    assert counts[1] == counts[0] + 1, f"Expected consecutive counts, got {counts}"
+
+    # Execute a third time and check execution count
+    bridge.send({
+        "action": "execute",
+        "code": "y = 2",
+        "cell_idx": 2
+    })
+
+    exec_input = bridge.wait_for_message("execute_input", timeout=10)
+    assert exec_input is not None
+    expected = counts[0] + 2
+    assert exec_input["execution_count"] == expected, f"Expected count {expected}, got {exec_input['execution_count']}"
+
+    print("PASS: Execution count increments correctly")
+
+
+def test_execute_result(bridge, kernel):
+    """Test execute_result output type."""
+    # Execute expression (should produce execute_result)
+    bridge.send({
+        "action": "execute",
+        "code": "1 + 1",
+        "cell_idx": 0
+    })
 
-        # Collect until idle
-        messages = []
-        while True:
-            msg = bridge.read_message(timeout=10)
-            if msg is None:
-                break
-            messages.append(msg)
-            if msg.get("type") == "status" and msg.get("state") == "idle":
-                break
+    # Collect until idle
+    _, by_type = bridge.collect_until_idle()
 
-        # Find error output
-        error_msg = next(
-            (m for m in messages if m["type"] == "output" and
-             m["output"]["output_type"] == "error"),
-            None
-        )
-        assert error_msg is not None, "Missing error output"
-        assert error_msg["output"]["ename"] == "NameError"
+    # Find execute_result
+    result_msg = next(
+        (m for m in by_type["output"] if m["output"]["output_type"] == "execute_result"),
+        None
+    )
+    assert result_msg is not None, "Missing execute_result output"
+    assert "2" in result_msg["output"]["data"]["text/plain"]
 
-        print("PASS: Error handling works")
-    finally:
-        bridge.stop()
+    print("PASS: Execute result works")
 
 
-def test_interrupt():
+def test_error_handling(bridge, kernel):
+    """Test error output from invalid code."""
+    # Execute invalid code
+    bridge.send({
+        "action": "execute",
+        "code": "undefined_variable",
+        "cell_idx": 0
+    })
+
+    # Collect until idle
+    _, by_type = bridge.collect_until_idle()
+
+    # Find error output
+    error_msg = next(
+        (m for m in by_type["output"] if m["output"]["output_type"] == "error"),
+        None
+    )
+    assert error_msg is not None, "Missing error output"
+    assert error_msg["output"]["ename"] == "NameError"
+
+    print("PASS: Error handling works")
+
+
+def test_complete_after_execute(bridge, kernel):
+    """Test completion is matched to its own request, not a stale execute_reply."""
+    # Plain execute leaves an execute_reply on the shell channel
+    bridge.send({
+        "action": "execute",
+        "code": "completion_target = 1",
+        "cell_idx": 0
+    })
+    bridge.collect_until_idle()
+
+    bridge.send({"action": "complete", "code": "completion_ta", "cursor_pos": 13})
+    reply = bridge.wait_for_message("complete_reply", timeout=10)
+    assert reply is not None, "Missing complete_reply"
+    assert "completion_target" in reply["matches"]
+
+    print("PASS: Completion after execute works")
+
+
+def test_inspect(bridge, kernel):
+    """Test inspect returns parsed sections."""
+    bridge.send({"action": "execute", "code": "inspect_target = 42", "cell_idx": 0})
+    bridge.collect_until_idle()
+
+    bridge.send({"action": "inspect", "code": "inspect_target", "request_id": "r1"})
+    reply = bridge.wait_for_message("inspect_reply", timeout=10)
+    assert reply is not None, "Missing inspect_reply"
+    assert reply["request_id"] == "r1"
+    assert reply["found"] is True
+    assert reply["sections"].get("type_name") == "int"
+    assert reply["sections"].get("string_form") == "42"
+
+    print("PASS: Inspect works")
+
+
+def test_inspect_source(bridge, kernel):
+    """Test detail_level=1 inspect keeps the Source section."""
+    bridge.send({"action": "execute", "code": "import json", "cell_idx": 0})
+    bridge.collect_until_idle()
+
+    bridge.send({
+        "action": "inspect",
+        "code": "json.dumps",
+        "detail_level": 1,
+        "request_id": "r2"
+    })
+    reply = bridge.wait_for_message("inspect_reply", timeout=10)
+    assert reply is not None, "Missing inspect_reply"
+    assert reply["request_id"] == "r2"
+    assert reply["found"] is True
+    assert "source" in reply["sections"], f"Missing source section: {reply['sections']!r}"
+    assert "source" in reply["sections"].get("_order", [])
+
+    print("PASS: Inspect source works")
+
+
+def test_interrupt(bridge, kernel):
     """Test kernel interrupt."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        bridge.wait_for_message("kernel_started", timeout=30)
-
-        # Execute long-running code
-        bridge.send({
-            "action": "execute",
-            "code": "import time; time.sleep(60)",
-            "cell_idx": 0
-        })
-
-        # Wait for busy state
-        bridge.wait_for_message("status", timeout=5)
-
-        # Interrupt
-        time.sleep(0.5)  # Give kernel time to start execution
-        bridge.send({"action": "interrupt"})
-
-        # Should get interrupted message
-        msg = bridge.wait_for_message("interrupted", timeout=10)
-        assert msg is not None, "Interrupt did not work"
-
-        print("PASS: Kernel interrupt works")
-    finally:
-        bridge.stop()
-
-
-def test_restart():
+    # Execute long-running code. Sleep in short steps: SIGINT may be delivered
+    # to one of the kernel's other threads, and then a single long sleep on the
+    # main thread only sees the KeyboardInterrupt once it finishes
+    bridge.send({
+        "action": "execute",
+        "code": "import time\nprint('sleeping', flush=True)\nfor _ in range(100): time.sleep(0.05)",
+        "cell_idx": 0
+    })
+
+    # Wait until the cell's own code is running; busy and execute_input are
+    # published before that, so an interrupt on either can land too early
+    started = bridge.wait_for_message(
+        "output", predicate=lambda m: m.get("cell_idx") == 0, timeout=5
+    )
+    assert started is not None, "Cell never started executing"
+
+    # Interrupt
+    sent = time.monotonic()
+    bridge._send_raw(_INTERRUPT)
+
+    # Should get interrupted message
+    msg = bridge.wait_for_message("interrupted", timeout=10)
+    assert msg is not None, "Interrupt did not work"
+
+    # The cell must stop well before its sleep would have finished
+    _, by_type = bridge.collect_until_idle(
+        lambda m: m.get("type") == "status" and m.get("state") == "idle" and m.get("cell_idx") == 0,
+        max_wait=10,
+    )
+    elapsed = time.monotonic() - sent
+    assert elapsed < 4, f"Cell ran {elapsed:.1f}s after interrupt; sleep was not interrupted"
+    assert any(
+        m["output"]["output_type"] == "error" and m["output"]["ename"] == "KeyboardInterrupt"
+        for m in by_type["output"]
+    ), "Missing KeyboardInterrupt error"
+
+    print("PASS: Kernel interrupt works")
+
+
+def test_restart(bridge, kernel):
     """Test kernel restart."""
-    bridge = KernelBridgeTest()
-    try:
-        bridge.start()
-        bridge.read_message()  # consume ready
-
-        # Start kernel
-        bridge.send({"action": "start", "kernel_name": "python3"})
-        bridge.wait_for_message("kernel_started", timeout=30)
-
-        # Execute to set a variable
-        bridge.send({
-            "action": "execute",
-            "code": "test_var = 'before_restart'",
-            "cell_idx": 0
-        })
-        while True:
-            msg = bridge.read_message(timeout=10)
-            if msg and msg.get("type") == "status" and msg.get("state") == "idle":
-                break
-
-        # Restart - collect all messages until we see 'restarted'
-        bridge.send({"action": "restart"})
-
-        # Read messages until we get 'restarted' or timeout
-        restarted = False
-        start = time.time()
-        while time.time() - start < 60:
-            msg = bridge.read_message(timeout=1)
-            if msg and msg.get("type") == "restarted":
-                restarted = True
-                break
-
-        assert restarted, "Restart did not complete"
-
-        # Wait a moment for kernel to be ready
-        time.sleep(1)
-
-        # Try to access the variable (should fail)
-        bridge.send({
-            "action": "execute",
-            "code": "test_var",
-            "cell_idx": 1
-        })
-
-        # Should get error (variable doesn't exist)
-        messages = []
-        while True:
-            msg = bridge.read_message(timeout=10)
-            if msg is None:
-                break
-            messages.append(msg)
-            if msg.get("type") == "status" and msg.get("state") == "idle":
-                break
-
-        error_msg = next(
-            (m for m in messages if m["type"] == "output" and
-             m["output"]["output_type"] == "error"),
-            None
-        )
-        assert error_msg is not None, "Variable should not exist after restart"
-
-        print("PASS: Kernel restart works")
-    finally:
-        bridge.stop()
+    # Execute to set a variable
+    bridge.send({
+        "action": "execute",
+        "code": "test_var = 'before_restart'",
+        "cell_idx": 0
+    })
+    bridge.collect_until_idle()
+
+    # Restart - collect all messages until we see 'restarted'
+    bridge._send_raw(_RESTART)
+
+    # The bridge only reports 'restarted' once the new kernel is ready
+    restarted = bridge.wait_for_message("restarted", timeout=60)
+    assert restarted is not None, "Restart did not complete"
+
+    # Try to access the variable (should fail)
+    bridge.send({
+        "action": "execute",
+        "code": "test_var",
+        "cell_idx": 1
+    })
+
+    # Should get error (variable doesn't exist); match this cell's idle, not a
+    # stray one from the restart handshake
+    _, by_type = bridge.collect_until_idle(
+        lambda m: m.get("type") == "status" and m.get("state") == "idle" and m.get("cell_idx") == 1
+    )
+
+    error_msg = next(
+        (m for m in by_type["output"] if m["output"]["output_type"] == "error"),
+        None
+    )
+    assert error_msg is not None, "Variable should not exist after restart"
+
+    print("PASS: Kernel restart works")
 
 
 def run_all_tests():
@@ -409,10 +546,16 @@ def run_all_tests():
         test_bridge_ready,
         test_ping_pong,
         test_kernel_start,
+        test_kernel_info,
         test_code_execution,
+        test_stream_burst,
+        test_late_output,
         test_execution_count,
         test_execute_result,
         test_error_handling,
+        test_complete_after_execute,
+        test_inspect,
+        test_inspect_source,
         test_interrupt,
         test_restart,
     ]
@@ -424,17 +567,29 @@ def run_all_tests():
     passed = 0
     failed = 0
 
-    for test in tests:
-        print(f"\n--- {test.__name__} ---")
-        try:
-            test()
-            passed += 1
-        except AssertionError as e:
-            print(f"FAIL: {e}")
-            failed += 1
-        except Exception as e:
-            print(f"ERROR: {e}")
-            failed += 1
+    bridge = KernelBridgeTest()
+    try:
+        bridge.start()
+        fixtures = {"bridge": bridge, "kernel": None}
+        for test in tests:
+            print(f"\n--- {test.__name__} ---")
+            try:
+                params = inspect.signature(test).parameters
+                if "kernel" in params and fixtures["kernel"] is None:
+                    msg = bridge.start_kernel()
+                    assert msg is not None, "Kernel did not start"
+                    fixtures["kernel"] = msg["kernel_id"]
+                test(*(fixtures[name] for name in params))
+                passed += 1
+            except AssertionError as e:
+                print(f"FAIL: {e}")
+                failed += 1
+            except Exception as e:
+                print(f"ERROR: {e}")
+                failed += 1
+            reset_bridge(bridge)
+    finally:
+        bridge.stop()
 
     print("\n" + "=" * 60)
     print(f"Results: {passed} passed, {failed} failed")